@@ -1,18 +1,24 @@
 from __future__ import annotations
 import random
 import csv
+from multiprocessing import Pool
 from typing import List
 
 from flip7_engine import GameState
-from mcts_agent import MCTSAgent
+from mcts_agent import MCTSAgent, _seed_rollout_rng
 
 
 class RandomAgent:
+    def __init__(self, rng: random.Random = None):
+        # defaults to the module RNG so _play_one's per-game random.seed
+        # keeps cached agents reproducible
+        self.rng = rng if rng is not None else random
+
     def choose_action(self, state: GameState) -> str:
         actions = state.legal_actions()
         if not actions:
             return 'stay'
-        return random.choice(actions)
+        return self.rng.choice(actions)
 
 
 class HeuristicAgent:
@@ -21,7 +27,7 @@ class HeuristicAgent:
         actions = state.legal_actions()
         if 'stay' not in actions and 'hit' not in actions:
             return 'stay'
-        cur_sum = sum(state.current_numbers)
+        cur_sum = state.current_sum
         if state.x2:
             cur_sum *= 2
         cur_sum += state.flat_modifiers
@@ -33,6 +39,10 @@ class HeuristicAgent:
 def play_game(agents: List, seed: int = None) -> int:
     st = GameState(num_players=len(agents), seed=seed)
     while not st.game_over():
+        # the deck is never refilled: when it runs out the game is over and
+        # the current leader takes it
+        if st.deck.remaining() == 0:
+            return max(range(len(agents)), key=lambda i: st.player_totals[i])
         cur = st.current_player
         agent = agents[cur]
         if isinstance(agent, MCTSAgent):
@@ -43,29 +53,64 @@ def play_game(agents: List, seed: int = None) -> int:
     return st.winner
 
 
+# per-worker agent cache: agents carry no per-game state, so each worker
+# builds one pair per (sims, weight, opponent) setting and reuses it
+_agent_cache = {}
+
+
+def _play_one(job):
+    """Play a single experiment game in a worker process.
+
+    `job` is (sims, flip7_weight, opponent_name, seed); returns the same
+    setting key plus the winner so the parent can tally results.
+    """
+    sims, w, opp, seed = job
+    # pin every RNG the game touches to the job seed -- the module RNG
+    # (RandomAgent, deck), the rollout-kernel RNG, and the cached agent's
+    # private RNGs -- so the sweep replays identically run to run
+    random.seed(seed)
+    _seed_rollout_rng(seed)
+    agents = _agent_cache.get((sims, w, opp))
+    if agents is None:
+        mcts = MCTSAgent(sims=sims, flip7_weight=w)
+        opponent = RandomAgent() if opp == 'random' else HeuristicAgent()
+        agents = [mcts, opponent]
+        _agent_cache[(sims, w, opp)] = agents
+    agents[0].reseed(seed)
+    winner = play_game(agents, seed=seed)
+    return sims, w, opp, winner
+
+
 def run_experiment(sims_list=(10, 100, 1000), weights=(0, 10, 25, 50, 100), opponents=('random', 'heuristic'), games_per_setting=2, out_file='experiment_results.csv'):
-    random.seed(0)
+    # Every game is independent, so fan the full sweep out over a process
+    # pool instead of running the 4-deep loop serially. Seeds are drawn
+    # up front from a fixed-seed RNG so results stay reproducible
+    # regardless of completion order.
+    seed_rng = random.Random(0)
+    jobs = []
+    for sims in sims_list:
+        for w in weights:
+            for opp in opponents:
+                for g in range(games_per_setting):
+                    jobs.append((sims, w, opp, seed_rng.randrange(1_000_000)))
+
+    tally = {(sims, w, opp): [0, 0]
+             for sims in sims_list for w in weights for opp in opponents}
+    with Pool() as pool:
+        for sims, w, opp, winner in pool.imap_unordered(_play_one, jobs, chunksize=8):
+            if winner == 0:
+                tally[(sims, w, opp)][0] += 1
+            elif winner == 1:
+                tally[(sims, w, opp)][1] += 1
+
     with open(out_file, 'w', newline='') as f:
-        writer = csv.writer(f)
+        # LF terminator so regenerated files diff cleanly in git
+        writer = csv.writer(f, lineterminator='\n')
         writer.writerow(['mcts_sims', 'flip7_weight', 'opponent', 'games', 'mcts_wins', 'opponent_wins'])
         for sims in sims_list:
             for w in weights:
                 for opp in opponents:
-                    mcts_wins = 0
-                    opp_wins = 0
-                    for g in range(games_per_setting):
-                        # instantiate agents fresh each game
-                        mcts = MCTSAgent(sims=sims, flip7_weight=w)
-                        if opp == 'random':
-                            opponent = RandomAgent()
-                        else:
-                            opponent = HeuristicAgent()
-                        agents = [mcts, opponent]
-                        winner = play_game(agents, seed=random.randrange(1_000_000))
-                        if winner == 0:
-                            mcts_wins += 1
-                        elif winner == 1:
-                            opp_wins += 1
+                    mcts_wins, opp_wins = tally[(sims, w, opp)]
                     writer.writerow([sims, w, opp, games_per_setting, mcts_wins, opp_wins])
                     print(f'sims={sims} weight={w} vs={opp} -> mcts_wins={mcts_wins} / {games_per_setting}')
 
@@ -1,8 +1,81 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Optional, Any, Dict
-import random
-import copy
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# Card codes. The deck holds one int8 per card instead of a Card object:
+#   0..12  -> number cards 0..12
+#   13..21 -> modifier cards +2..+10 (value = code - 11)
+#   22     -> x2 multiplier
+#   23     -> Freeze
+#   24     -> FlipThree
+#   25     -> SecondChance
+X2 = 22
+FREEZE = 23
+FLIP_THREE = 24
+SECOND_CHANCE = 25
+
+# Lookup tables indexed by card code, for display and generic dispatch.
+KIND = ('number',) * 13 + ('modifier',) * 9 + ('mult',) + ('action',) * 3
+VALUE = tuple(range(13)) + tuple(range(2, 11)) + (0, 0, 0, 0)
+NAME = (None,) * 23 + ('Freeze', 'FlipThree', 'SecondChance')
+
+# Shared action tuples so legal_actions() never allocates.
+_HIT_STAY = ('hit', 'stay')
+_EMPTY = ()
+
+# Status codes returned by apply_action_fast / _process_draw. Codes at or
+# above ROUND_END_THRESHOLD ended the round for the acting player.
+NUMBER_ADDED = 0
+MODIFIER_ADDED = 1
+X2_ADDED = 2
+SECOND_CHANCE_ADDED = 3
+DUPLICATE_DISCARDED = 4
+FLIPTHREE_DONE = 5
+STAYED = 6
+BUST = 7
+FLIP7 = 8
+FROZE = 9
+FLIPTHREE_END = 10
+ROUND_END_THRESHOLD = BUST
+# internal signal from _process_draw: a FlipThree was drawn and the caller's
+# draw loop owes three more draws; never escapes apply_action_fast
+_FLIPTHREE_DRAWN = -1
+
+# result-name strings for the dict-returning apply_action wrapper
+_STATUS_NAMES = ('number_added', 'modifier_added', 'x2_added',
+                 'secondchance_added', 'duplicate_discarded',
+                 'flipthree_done', 'stayed', 'bust', 'flip7', 'freeze',
+                 'flipthree_resolved')
+
+
+def _build_base_codes() -> np.ndarray:
+    """Build the 94-card base deck template (read-only, shared by all decks)."""
+    codes: List[int] = []
+    # number cards
+    # 0:1, 1:1, 2:2, ..., 12:12
+    codes.append(0)
+    codes.append(1)
+    for n in range(2, 13):
+        codes.extend([n] * n)
+
+    # modifiers +2..+10 (one each)
+    codes.extend(range(13, 22))
+
+    # action and special cards to fill remaining counts (total action cards = 15)
+    # We'll use: Freeze x2, FlipThree x2, SecondChance x1, x2 x1 -> 6
+    # plus the 9 modifiers above -> 15 total action cards
+    codes.extend([FREEZE, FREEZE, FLIP_THREE, FLIP_THREE, SECOND_CHANCE, X2])
+
+    arr = np.array(codes, dtype=np.int8)
+    assert len(arr) == 94, f"Deck size mismatch: {len(arr)}"
+    arr.setflags(write=False)
+    return arr
+
+
+_BASE_CODES = _build_base_codes()
 
 
 @dataclass(frozen=True)
@@ -21,6 +94,16 @@ class Card:
         return f"{self.name}"
 
 
+def card_from_code(code: int) -> Card:
+    """Decode an int8 card code back into a Card (display/debugging only)."""
+    kind = KIND[code]
+    if kind == 'number' or kind == 'modifier':
+        return Card(kind, VALUE[code])
+    if kind == 'mult':
+        return Card('mult')
+    return Card('action', name=NAME[code])
+
+
 class Flip7Deck:
     """
     Deck for Flip 7 with custom distribution:
@@ -28,54 +111,41 @@ class Flip7Deck:
       - Modifier cards: +2 ... +10 (one each)
       - Action cards: Freeze x2, FlipThree x2, SecondChance x1, x2 multiplier x1
     Total cards: 94
+
+    Cards are stored as a flat int8 code array; `top` is the cursor of the
+    next card to draw, so drawing never shifts or reallocates the array.
     """
 
     def __init__(self, seed: Optional[int] = None):
-        self.rng = random.Random(seed)
-        self.cards: List[Card] = []
-        # number cards
-        # 0:1, 1:1, 2:2, ..., 12:12
-        self.cards.append(Card('number', 0))
-        self.cards.append(Card('number', 1))
-        for n in range(2, 13):
-            for _ in range(n):
-                self.cards.append(Card('number', n))
-
-        # modifiers +2..+10 (one each)
-        for m in range(2, 11):
-            self.cards.append(Card('modifier', m))
-
-        # action and special cards to fill remaining counts (total action cards = 15)
-        # We'll use: Freeze x2, FlipThree x2, SecondChance x1, x2 x1 -> 6
-        # plus the 9 modifiers above -> 15 total action cards
-        self.cards.extend([Card('action', name='Freeze') for _ in range(2)])
-        self.cards.extend([Card('action', name='FlipThree') for _ in range(2)])
-        self.cards.append(Card('action', name='SecondChance'))
-        self.cards.append(Card('mult'))
-
-        assert len(self.cards) == 94, f"Deck size mismatch: {len(self.cards)}"
+        self.rng = np.random.default_rng(seed)
+        self.codes = _BASE_CODES.copy()
+        self.top = 0
 
     def shuffle(self, seed: Optional[int] = None):
         if seed is not None:
-            self.rng.seed(seed)
-        self.rng.shuffle(self.cards)
+            self.rng = np.random.default_rng(seed)
+        self.rng.shuffle(self.codes[self.top:])
 
-    def draw(self) -> Card:
-        if not self.cards:
+    def draw(self) -> int:
+        if self.top >= len(self.codes):
             raise IndexError("Drawing from empty deck")
-        return self.cards.pop(0)
+        code = int(self.codes[self.top])
+        self.top += 1
+        return code
 
     def remaining(self) -> int:
-        return len(self.cards)
+        return len(self.codes) - self.top
 
     def copy(self) -> 'Flip7Deck':
-        d = Flip7Deck()
-        d.cards = self.cards.copy()
-        d.rng = random.Random()
+        d = Flip7Deck.__new__(Flip7Deck)
+        d.rng = np.random.default_rng()
+        d.codes = self.codes.copy()
+        d.top = self.top
         return d
 
-    def set_cards(self, cards: List[Card]):
-        self.cards = list(cards)
+    def set_codes(self, codes: Sequence[int]):
+        self.codes = np.asarray(codes, dtype=np.int8)
+        self.top = 0
 
 
 class GameState:
@@ -97,29 +167,55 @@ class GameState:
 
         # Current turn info (only for the active player)
         self.current_numbers: List[int] = []
+        # Bit i set <=> number i is in the current line; keeps duplicate and
+        # Flip7 checks O(1) instead of scanning/re-setting current_numbers.
+        self.seen_mask: int = 0
+        # running sum of current_numbers, so scoring needs no list walk
+        self.current_sum: int = 0
         self.flat_modifiers: int = 0
         self.x2: bool = False
         self.second_chance_count: int = 0
         self.round_over: bool = False
         self.winner: Optional[int] = None
+        self._last_card: int = -1
 
     def clone(self) -> 'GameState':
-        return copy.deepcopy(self)
-
-    def legal_actions(self) -> List[str]:
+        # Hand-rolled shallow clone: this runs several times per MCTS
+        # iteration, and deepcopy's memo walk dominated simulation time.
+        new = GameState.__new__(GameState)
+        new.num_players = self.num_players
+        new.player_totals = self.player_totals[:]
+        new.current_player = self.current_player
+        new.current_numbers = self.current_numbers[:]
+        new.seen_mask = self.seen_mask
+        new.current_sum = self.current_sum
+        new.flat_modifiers = self.flat_modifiers
+        new.x2 = self.x2
+        new.second_chance_count = self.second_chance_count
+        new.round_over = self.round_over
+        new.winner = self.winner
+        new._last_card = self._last_card
+        new.deck = Flip7Deck.__new__(Flip7Deck)
+        new.deck.codes = self.deck.codes.copy()
+        new.deck.top = self.deck.top
+        # Share the RNG: MCTS re-shuffles every determinized clone anyway.
+        new.deck.rng = self.deck.rng
+        return new
+
+    def legal_actions(self) -> Sequence[str]:
         if self.round_over or self.winner is not None:
-            return []
-        return ['hit', 'stay']
+            return _EMPTY
+        return _HIT_STAY
 
-    def set_deck(self, cards: List[Card]):
-        self.deck.set_cards(cards)
+    def set_deck(self, codes: Sequence[int]):
+        self.deck.set_codes(codes)
 
     def _sum_current_score(self) -> int:
-        s = sum(self.current_numbers)
+        s = self.current_sum
         if self.x2:
             s *= 2
         s += self.flat_modifiers
-        if len(set(self.current_numbers)) >= 7:
+        if self.seen_mask.bit_count() >= 7:
             s += 15
         return s
 
@@ -130,6 +226,8 @@ class GameState:
         self.player_totals[self.current_player] += score
         # reset current line
         self.current_numbers = []
+        self.seen_mask = 0
+        self.current_sum = 0
         self.flat_modifiers = 0
         self.x2 = False
         self.second_chance_count = 0
@@ -140,10 +238,22 @@ class GameState:
     def apply_action(self, action: str) -> Dict[str, Any]:
         """
         Apply an action: 'hit' or 'stay'. Returns a result dict describing outcome.
+
+        Thin wrapper over apply_action_fast for external callers; search and
+        rollout code uses the int-status path directly and skips the dict.
         """
         if action not in self.legal_actions():
             raise ValueError(f"Illegal action: {action}")
+        status = self.apply_action_fast(action)
+        if status == STAYED:
+            return {'result': 'stayed', 'banked': True}
+        res = {'result': _STATUS_NAMES[status], 'card': self._last_card}
+        if status >= ROUND_END_THRESHOLD:
+            res['round_end'] = True
+        return res
 
+    def apply_action_fast(self, action: str) -> int:
+        """Apply 'hit' or 'stay' without legality checks; returns a status code."""
         self.round_over = False
 
         if action == 'stay':
@@ -151,89 +261,98 @@ class GameState:
             # advance player
             self.current_player = (self.current_player + 1) % self.num_players
             self.round_over = False
-            return {'result': 'stayed', 'banked': True}
+            return STAYED
 
         # action == 'hit'
         card = self.deck.draw()
-        outcome = self._process_draw(card)
+        self._last_card = card
+        status = self._process_draw(card)
+        # FlipThree resolution lives here as an iterative pending-draws loop
+        # (nested FlipThrees just add 3 more) instead of recursing through
+        # _process_draw, so the draw path stays a flat dispatch.
+        if status == _FLIPTHREE_DRAWN:
+            pending = 3
+            status = FLIPTHREE_DONE
+            while pending > 0 and status < ROUND_END_THRESHOLD:
+                if self.deck.remaining() == 0:
+                    break
+                pending -= 1
+                s = self._process_draw(self.deck.draw())
+                if s == _FLIPTHREE_DRAWN:
+                    pending += 3
+                elif s >= ROUND_END_THRESHOLD:
+                    status = FLIPTHREE_END
         # if round ended due to bank or bust, advance player
-        if outcome.get('round_end'):
+        if status >= ROUND_END_THRESHOLD:
             self.current_player = (self.current_player + 1) % self.num_players
             self.round_over = False
-        return outcome
+        return status
 
-    def _process_draw(self, card: Card) -> Dict[str, Any]:
+    def _process_draw(self, card: int) -> int:
         # Number card
-        if card.kind == 'number':
-            v = card.value
-            if v in self.current_numbers:
+        if card <= 12:
+            bit = 1 << card
+            if self.seen_mask & bit:
                 # duplicate -> potential bust
                 if self.second_chance_count > 0:
                     # discard the duplicate and consume second chance
                     self.second_chance_count -= 1
-                    return {'result': 'duplicate_discarded', 'card': card}
+                    return DUPLICATE_DISCARDED
                 else:
                     # bust: score 0 for round, end turn
                     # reset current line (no points)
                     self.current_numbers = []
+                    self.seen_mask = 0
+                    self.current_sum = 0
                     self.flat_modifiers = 0
                     self.x2 = False
                     self.second_chance_count = 0
                     self.round_over = True
-                    return {'result': 'bust', 'card': card, 'round_end': True}
+                    return BUST
             else:
-                self.current_numbers.append(v)
+                self.seen_mask |= bit
+                self.current_numbers.append(card)
+                self.current_sum += card
                 # Flip7 bonus check
-                if len(set(self.current_numbers)) >= 7:
+                if self.seen_mask.bit_count() >= 7:
                     # bank with +15 and end
                     score = self._sum_current_score()
                     self.player_totals[self.current_player] += score
                     self.current_numbers = []
+                    self.seen_mask = 0
+                    self.current_sum = 0
                     self.flat_modifiers = 0
                     self.x2 = False
                     self.second_chance_count = 0
                     self.round_over = True
                     if self.player_totals[self.current_player] >= 200:
                         self.winner = self.current_player
-                    return {'result': 'flip7', 'card': card, 'banked': score, 'round_end': True}
-                return {'result': 'number_added', 'card': card}
+                    return FLIP7
+                return NUMBER_ADDED
 
         # Modifier card: add flat modifier
-        if card.kind == 'modifier':
-            self.flat_modifiers += card.value
-            return {'result': 'modifier_added', 'card': card}
+        if card <= 21:
+            self.flat_modifiers += card - 11
+            return MODIFIER_ADDED
 
         # Multiplier x2
-        if card.kind == 'mult':
+        if card == X2:
             self.x2 = True
-            return {'result': 'x2_added', 'card': card}
+            return X2_ADDED
 
         # Other action cards
-        if card.kind == 'action':
-            name = card.name
-            if name == 'Freeze':
-                # forces a bank
-                self._bank_current()
-                self.round_over = True
-                return {'result': 'freeze', 'card': card, 'round_end': True}
-            if name == 'FlipThree':
-                # force next three cards (or until bust)
-                draws = []
-                for _ in range(3):
-                    if self.deck.remaining() == 0:
-                        break
-                    c = self.deck.draw()
-                    draws.append(c)
-                    res = self._process_draw(c)
-                    # if a nested FlipThree triggers recursively, that behavior is allowed
-                    if res.get('round_end'):
-                        return {'result': 'flipthree_resolved', 'card': card, 'draws': draws, 'round_end': True}
-                return {'result': 'flipthree_done', 'card': card, 'draws': draws}
-            if name == 'SecondChance':
-                self.second_chance_count += 1
-                return {'result': 'secondchance_added', 'card': card}
-
-        return {'result': 'unknown_card', 'card': card}
+        if card == FREEZE:
+            # forces a bank
+            self._bank_current()
+            self.round_over = True
+            return FROZE
+        if card == FLIP_THREE:
+            # the three forced draws are owed by the caller's draw loop
+            return _FLIPTHREE_DRAWN
+
+        # SECOND_CHANCE
+        self.second_chance_count += 1
+        return SECOND_CHANCE_ADDED
 
     def game_over(self) -> bool:
         return self.winner is not None
@@ -250,4 +369,13 @@ if __name__ == '__main__':
     # quick smoke test
     gs = GameState(num_players=2, seed=42)
     print(gs)
-    print('Top 5 deck:', gs.deck.cards[:5])
\ No newline at end of file
+    print('Top 5 deck:', [card_from_code(c) for c in gs.deck.codes[:5]])
+
+    # clone() is the only cloning primitive; make sure it stays independent
+    cl = gs.clone()
+    assert type(cl) is GameState
+    assert cl.deck.codes is not gs.deck.codes
+    assert cl.player_totals is not gs.player_totals
+    cl.apply_action('hit')
+    assert gs.deck.top == 0 and cl.deck.top == 1
+    print('clone smoke test passed')
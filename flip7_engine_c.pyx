@@ -0,0 +1,132 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""Cython build of the random-playout kernel from mcts_agent.
+
+Covers the scalar `_rollout_loop` (the hot inner core); the parallel batch
+kernels stay on numba. Build in place with:
+
+    python setup.py build_ext --inplace
+
+mcts_agent picks this module up automatically when numba is unavailable
+and falls back to the interpreted loop when neither is present.
+"""
+from libc.stdlib cimport rand, srand, RAND_MAX
+
+
+def seed_rollout_rng(seed):
+    """Seed the C RNG the kernel draws its hit/stay coin flips from."""
+    srand(seed & 0x7FFFFFFF)
+
+
+cdef inline double _unit_rand() noexcept:
+    return rand() / (RAND_MAX + 1.0)
+
+
+def rollout_loop(const signed char[::1] codes, long long top,
+                 long long[::1] totals, long long cur, long long num_players,
+                 long long seen, long long nums_sum, long long flat,
+                 bint x2, long long sc, long long n_unique, long long winner):
+    """Drop-in for mcts_agent._rollout_loop: same arguments, same returns.
+
+    Mutates `totals` in place and returns the remaining scalar state plus
+    the flip7 flag, exactly like the numba/interpreted versions.
+    """
+    cdef long long n = codes.shape[0]
+    cdef bint flip7 = False
+    cdef bint round_end = False
+    cdef long long pending = 0
+    cdef long long code, bit, score
+
+    while not round_end:
+        if pending == 0:
+            if top >= n:
+                break
+            if _unit_rand() < 0.5:
+                # stay: bank the line and pass the turn
+                if seen != 0:
+                    score = nums_sum * 2 if x2 else nums_sum
+                    score += flat
+                    if n_unique >= 7:
+                        score += 15
+                    totals[cur] += score
+                seen = 0
+                nums_sum = 0
+                flat = 0
+                x2 = False
+                sc = 0
+                n_unique = 0
+                if totals[cur] >= 200:
+                    winner = cur
+                cur = (cur + 1) % num_players
+                if winner >= 0:
+                    break
+                continue
+        else:
+            if top >= n:
+                # deck ran dry inside a FlipThree; turn peters out
+                pending = 0
+                continue
+            pending -= 1
+
+        code = codes[top]
+        top += 1
+
+        if code <= 12:
+            bit = 1 << code
+            if seen & bit:
+                if sc > 0:
+                    sc -= 1
+                else:
+                    # bust: line is lost, round ends
+                    seen = 0
+                    nums_sum = 0
+                    flat = 0
+                    x2 = False
+                    sc = 0
+                    n_unique = 0
+                    round_end = True
+            else:
+                seen |= bit
+                nums_sum += code
+                n_unique += 1
+                if n_unique >= 7:
+                    # Flip7: bank with the +15 bonus, round ends
+                    totals[cur] += (nums_sum * 2 if x2 else nums_sum) + flat + 15
+                    flip7 = True
+                    seen = 0
+                    nums_sum = 0
+                    flat = 0
+                    x2 = False
+                    sc = 0
+                    n_unique = 0
+                    if totals[cur] >= 200:
+                        winner = cur
+                    round_end = True
+        elif code <= 21:
+            flat += code - 11
+        elif code == 22:
+            x2 = True
+        elif code == 23:
+            # Freeze: forced bank, round ends
+            if seen != 0:
+                score = nums_sum * 2 if x2 else nums_sum
+                score += flat
+                if n_unique >= 7:
+                    score += 15
+                totals[cur] += score
+            seen = 0
+            nums_sum = 0
+            flat = 0
+            x2 = False
+            sc = 0
+            n_unique = 0
+            if totals[cur] >= 200:
+                winner = cur
+            round_end = True
+        elif code == 24:
+            pending += 3
+        else:
+            sc += 1
+
+    if round_end:
+        cur = (cur + 1) % num_players
+    return top, cur, seen, nums_sum, flat, x2, sc, winner, flip7
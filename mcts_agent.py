@@ -1,12 +1,201 @@
 from __future__ import annotations
 import random
-import copy
 from math import sqrt, log
 from typing import Optional, Dict, Any, Tuple
 
 from flip7_engine import GameState, Flip7Deck, Card
+import multiprocessing
+import os
+import pickle
 import sys
 import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; the kernels below run interpreted
+    njit = None
+    prange = range
+
+
+_NEG_INF = float('-inf')
+
+
+def _rollout_loop(codes, top, totals, cur, num_players, seen, nums_sum, flat,
+                  x2, sc, n_unique, winner):
+    """Core random-playout loop over raw card codes.
+
+    Written against primitives only (int8 code array, int bitmask, int64
+    totals array) so it compiles under numba; without numba it runs
+    interpreted with identical semantics. Mutates `totals` in place and
+    returns the remaining scalar state plus the flip7 flag.
+    """
+    n = codes.shape[0]
+    flip7 = False
+    round_end = False
+    pending = 0  # forced draws still owed by drawn FlipThree cards
+
+    while not round_end:
+        if pending == 0:
+            if top >= n:
+                break
+            if np.random.random() < 0.5:
+                # stay: bank the line and pass the turn
+                if seen != 0:
+                    score = nums_sum * 2 if x2 else nums_sum
+                    score += flat
+                    if n_unique >= 7:
+                        score += 15
+                    totals[cur] += score
+                seen = 0
+                nums_sum = 0
+                flat = 0
+                x2 = False
+                sc = 0
+                n_unique = 0
+                if totals[cur] >= 200:
+                    winner = cur
+                cur = (cur + 1) % num_players
+                if winner >= 0:
+                    break
+                continue
+        else:
+            if top >= n:
+                # deck ran dry inside a FlipThree; turn peters out
+                pending = 0
+                continue
+            pending -= 1
+
+        # int() matters when running interpreted: an np.int8 code would make
+        # `1 << code` and the sums stay int8 and overflow for codes >= 8
+        code = int(codes[top])
+        top += 1
+
+        if code <= 12:
+            bit = 1 << code
+            if seen & bit:
+                if sc > 0:
+                    sc -= 1
+                else:
+                    # bust: line is lost, round ends
+                    seen = 0
+                    nums_sum = 0
+                    flat = 0
+                    x2 = False
+                    sc = 0
+                    n_unique = 0
+                    round_end = True
+            else:
+                seen |= bit
+                nums_sum += code
+                n_unique += 1
+                if n_unique >= 7:
+                    # Flip7: bank with the +15 bonus, round ends
+                    totals[cur] += (nums_sum * 2 if x2 else nums_sum) + flat + 15
+                    flip7 = True
+                    seen = 0
+                    nums_sum = 0
+                    flat = 0
+                    x2 = False
+                    sc = 0
+                    n_unique = 0
+                    if totals[cur] >= 200:
+                        winner = cur
+                    round_end = True
+        elif code <= 21:
+            flat += code - 11
+        elif code == 22:
+            x2 = True
+        elif code == 23:
+            # Freeze: forced bank, round ends
+            if seen != 0:
+                score = nums_sum * 2 if x2 else nums_sum
+                score += flat
+                if n_unique >= 7:
+                    score += 15
+                totals[cur] += score
+            seen = 0
+            nums_sum = 0
+            flat = 0
+            x2 = False
+            sc = 0
+            n_unique = 0
+            if totals[cur] >= 200:
+                winner = cur
+            round_end = True
+        elif code == 24:
+            pending += 3
+        else:
+            sc += 1
+
+    if round_end:
+        cur = (cur + 1) % num_players
+    return top, cur, seen, nums_sum, flat, x2, sc, winner, flip7
+
+
+def _rollout_batch_leaves(decks, tops, totals, curs, num_players, seens,
+                          nums_sums, flats, x2s, scs, n_uniques, winners,
+                          flip7_weight):
+    """Roll out m different leaf states, one per row of the SoA arrays.
+
+    Row i holds leaf i's (already private) deck and line state, so each
+    rollout shuffles its own undrawn tail and plays out independently.
+    Compiled with parallel=True under numba so the rollouts spread across
+    threads.
+    """
+    m = tops.shape[0]
+    rewards = np.empty(m, np.float64)
+    for i in prange(m):
+        c = decks[i]
+        np.random.shuffle(c[tops[i]:])
+        t = totals[i]
+        player = curs[i]
+        start = t[player]
+        res = _rollout_loop(c, tops[i], t, player, num_players, seens[i],
+                            nums_sums[i], flats[i], x2s[i], scs[i],
+                            n_uniques[i], winners[i])
+        r = float(t[player] - start)
+        if res[8]:
+            r += flip7_weight
+        rewards[i] = r
+    return rewards
+
+
+def _seed_rollout_rng(seed):
+    """Seed the RNG the rollout kernels draw from (numba keeps its own)."""
+    np.random.seed(seed)
+
+
+if njit is not None:
+    _rollout_loop = njit(cache=True)(_rollout_loop)
+    _rollout_batch_leaves = njit(cache=True, parallel=True)(_rollout_batch_leaves)
+    _seed_rollout_rng = njit(cache=True)(_seed_rollout_rng)
+else:
+    # No numba: use the Cython build of the scalar kernel if present
+    # (python setup.py build_ext --inplace), else stay interpreted. The
+    # parallel batch kernels have no Cython counterpart and run interpreted.
+    try:
+        from flip7_engine_c import (rollout_loop as _rollout_loop,
+                                    seed_rollout_rng as _seed_rollout_rng)
+    except ImportError:
+        pass
+
+
+def _run_partial(payload):
+    """Worker for root-parallel search: one independent tree per process.
+
+    `payload` is (pickled root state, sims, seed, flip7_weight); returns the
+    worker tree's per-action (visits, value_sum) for merging at the root.
+    """
+    state_bytes, sims, seed, flip7_weight = payload
+    # the agent's own Random/Generator are seeded via the constructor; only
+    # the rollout kernels keep separate RNG state that needs seeding here
+    _seed_rollout_rng(seed)
+    state = pickle.loads(state_bytes)
+    agent = MCTSAgent(sims=sims, flip7_weight=flip7_weight, seed=seed)
+    return agent._search(state, sims)
 
 
 class Node:
@@ -18,60 +207,118 @@ class Node:
         self.visits = 0
         self.value = 0.0
 
-    def ucb1(self, c_param: float = 1.4) -> float:
-        if self.visits == 0:
-            return float('inf')
-        return self.value / self.visits + c_param * sqrt(log(self.parent.visits) / self.visits)
-
 
 class MCTSAgent:
-    def __init__(self, sims: int = 1000, flip7_weight: float = 50.0):
+    def __init__(self, sims: int = 1000, flip7_weight: float = 50.0, seed: Optional[int] = None):
         self.sims = sims
         self.flip7_weight = flip7_weight
+        # generator for determinization shuffles: permuting the int8 tail
+        # through numpy beats random.shuffle's per-element Python swaps
+        self.np_rng = np.random.default_rng(seed)
+        # private Random for tree-policy choices and worker seeds, so the
+        # agent never touches (or depends on) the module-level RNG state
+        self.rng = random.Random(seed)
+        # transposition table: packed line-state key -> (reward_sum, count)
+        self.tt: Dict[int, Tuple[float, int]] = {}
+
+    def reseed(self, seed: int):
+        """Re-seed the agent's private RNGs.
+
+        Lets the experiment harness pin a cached agent to a per-game seed so
+        sweeps stay reproducible regardless of job completion order.
+        """
+        self.rng.seed(seed)
+        self.np_rng = np.random.default_rng(seed)
 
     def determinize(self, state: GameState) -> GameState:
         st = state.clone()
-        # shuffle the unknown deck (determinization)
-        random.shuffle(st.deck.cards)
+        # shuffle the unknown (undrawn) part of the deck (determinization)
+        self.np_rng.shuffle(st.deck.codes[st.deck.top:])
         return st
 
     def default_policy(self, state: GameState) -> Tuple[float, Dict[str, Any]]:
         # random playout until round end or deck empty
         st = state.clone()
+        return self._rollout_inplace(st)
+
+    def _rollout_inplace(self, st: GameState) -> Tuple[float, Dict[str, Any]]:
+        """Random playout mutating `st` directly; same contract as default_policy.
+
+        Marshals the state into primitives and hands the draw loop to
+        _rollout_loop (numba-compiled when available). Like default_policy,
+        the playout runs past 'stay' banks (which only pass the turn) and
+        stops on a bust/Flip7/Freeze round end, a winner, or an exhausted
+        deck.
+        """
         player = st.current_player
         start_score = st.player_totals[player]
         flip7_hit = False
-        while True:
-            if st.game_over() or st.deck.remaining() == 0:
-                break
-            actions = st.legal_actions()
-            if not actions:
-                break
-            act = random.choice(actions)
-            res = st.apply_action(act)
-            if res.get('result') == 'flip7':
-                flip7_hit = True
-            if res.get('round_end'):
-                break
-        end_score = st.player_totals[player]
-        reward = end_score - start_score
+
+        if not (st.game_over() or st.round_over):
+            totals = np.asarray(st.player_totals, dtype=np.int64)
+            seen = st.seen_mask
+            top, cur, seen, nums_sum, flat, x2, sc, winner, flip7_hit = _rollout_loop(
+                st.deck.codes, st.deck.top, totals, player, st.num_players,
+                seen, st.current_sum, st.flat_modifiers, st.x2,
+                st.second_chance_count, seen.bit_count(),
+                -1 if st.winner is None else st.winner)
+
+            # write the results back so the (discardable) clone stays coherent
+            st.deck.top = int(top)
+            st.current_player = int(cur)
+            st.player_totals = totals.tolist()
+            st.current_numbers = [v for v in range(13) if seen >> v & 1]
+            st.seen_mask = int(seen)
+            st.flat_modifiers = int(flat)
+            st.x2 = bool(x2)
+            st.second_chance_count = int(sc)
+            st.winner = int(winner) if winner >= 0 else None
+
+        reward = float(st.player_totals[player] - start_score)
         if flip7_hit:
             reward += self.flip7_weight
         return reward, {'flip7': flip7_hit}
 
     def expand(self, node: Node):
-        actions = node.state.legal_actions()
-        for a in actions:
+        # children start stateless; _materialize builds their state from a
+        # fresh determinized clone of the parent on first selection
+        for a in node.state.legal_actions():
             if a not in node.children:
-                new_state = node.state.clone()
-                # determinize per-child expansion
-                random.shuffle(new_state.deck.cards)
-                node.children[a] = Node(new_state, parent=node, action=a)
+                node.children[a] = Node(None, parent=node, action=a)
+
+    def _materialize(self, node: Node) -> GameState:
+        st = node.parent.state.clone()
+        self.np_rng.shuffle(st.deck.codes[st.deck.top:])
+        if not (st.round_over or st.winner is not None):
+            if node.action == 'stay' or st.deck.remaining() > 0:
+                st.apply_action_fast(node.action)
+        node.state = st
+        return st
 
     def best_child(self, node: Node, c_param: float = 1.4) -> Node:
-        choices = list(node.children.values())
-        scores = [child.ucb1(c_param) for child in choices]
-        return choices[scores.index(max(scores))]
+        # Single pass over the children with UCB1 inlined: an unvisited child
+        # scores infinite, and log(parent.visits) is computed once, not per child.
+        lp = log(node.visits) if node.visits > 0 else 0.0
+        best = None
+        best_score = _NEG_INF
+        for child in node.children.values():
+            v = child.visits
+            if v == 0:
+                return child
+            score = child.value / v + c_param * sqrt(lp / v)
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+    @staticmethod
+    def _line_key(st: GameState) -> int:
+        """Pack the current line into one int: seen:13 | x2:1 | sc:2 | flat:6 | sum:rest."""
+        return (st.seen_mask
+                | (1 << 13 if st.x2 else 0)
+                | min(st.second_chance_count, 3) << 14
+                | st.flat_modifiers << 16
+                | st.current_sum << 22)
 
     def backup(self, node: Node, reward: float):
         cur = node
@@ -88,86 +335,358 @@ class MCTSAgent:
             # all children visited? choose best by UCB1
             cur = self.best_child(cur)
 
-    def run(self, root_state: GameState, sims: Optional[int] = None) -> str:
+    def _search(self, root_state: GameState, sims: int, k: int = 8) -> Dict[str, Tuple[int, float]]:
+        """Build one search tree and return per-action (visits, value_sum).
+
+        Iterations run in batches of up to `k`: each batch selects k leaves
+        (counting their visits immediately as a virtual loss, so repeated
+        selections within the batch spread over the tree), then evaluates
+        all the uncached leaves in one fused _rollout_batch_leaves call and
+        backs the rewards up.
+        """
+        root = Node(self.determinize(root_state))
+        # root children appear on the second visit via expand(); the first
+        # iteration rolls out from the root itself
+
+        # Identical line states recur under many determinizations, so cache
+        # rollout value estimates per packed line key for this search.
+        tt = self.tt
+        tt.clear()
+
+        # hoist the per-iteration lookups out of the sims loop
+        best_child = self.best_child
+        expand = self.expand
+        line_key = self._line_key
+        tt_get = tt.get
+        choice = self.rng.choice
+
+        n_cards = len(root_state.deck.codes)
+        num_players = root_state.num_players
+        done = 0
+        while done < sims:
+            batch = min(k, sims - done)
+            done += batch
+
+            leaves = []
+            for _ in range(batch):
+                # selection using UCB1 until a leaf
+                node = root
+                while node.children:
+                    node = best_child(node)
+
+                # expand
+                if node.visits > 0:
+                    expand(node)
+                    if node.children:
+                        node = choice(list(node.children.values()))
+
+                st = node.state
+                if st is None:
+                    st = self._materialize(node)
+
+                # virtual loss: count the visit up front so the remaining
+                # selections in this batch are steered to other leaves
+                vnode = node
+                while vnode is not None:
+                    vnode.visits += 1
+                    vnode = vnode.parent
+                leaves.append((node, st))
+
+            # resolve cached leaves from the transposition table; the rest
+            # go to the batched rollout kernel
+            need = []
+            for node, st in leaves:
+                key = line_key(st)
+                reward_sum, count = tt_get(key, (0.0, 0))
+                if count >= 8:
+                    self._backup_value(node, reward_sum / count)
+                elif st.game_over() or st.round_over:
+                    tt[key] = (reward_sum, count + 1)
+                    self._backup_value(node, 0.0)
+                else:
+                    need.append((node, key, reward_sum, count))
+
+            if need:
+                m = len(need)
+                decks = np.empty((m, n_cards), np.int8)
+                tops = np.empty(m, np.int64)
+                totals = np.empty((m, num_players), np.int64)
+                curs = np.empty(m, np.int64)
+                seens = np.empty(m, np.int64)
+                nums_sums = np.empty(m, np.int64)
+                flats = np.empty(m, np.int64)
+                x2s = np.empty(m, bool)
+                scs = np.empty(m, np.int64)
+                n_uniques = np.empty(m, np.int64)
+                winners = np.empty(m, np.int64)
+                for i, (node, key, reward_sum, count) in enumerate(need):
+                    st = node.state
+                    decks[i] = st.deck.codes
+                    tops[i] = st.deck.top
+                    totals[i] = st.player_totals
+                    curs[i] = st.current_player
+                    seens[i] = st.seen_mask
+                    nums_sums[i] = st.current_sum
+                    flats[i] = st.flat_modifiers
+                    x2s[i] = st.x2
+                    scs[i] = st.second_chance_count
+                    n_uniques[i] = st.seen_mask.bit_count()
+                    winners[i] = -1 if st.winner is None else st.winner
+                rewards = _rollout_batch_leaves(
+                    decks, tops, totals, curs, num_players, seens, nums_sums,
+                    flats, x2s, scs, n_uniques, winners, self.flip7_weight)
+                for i, (node, key, reward_sum, count) in enumerate(need):
+                    reward = float(rewards[i])
+                    tt[key] = (reward_sum + reward, count + 1)
+                    self._backup_value(node, reward)
+
+        # a tiny budget (sims < 2) never revisits the root, so it was never
+        # expanded; expand it here so run() always has root statistics
+        if not root.children:
+            expand(root)
+        return {a: (child.visits, child.value) for a, child in root.children.items()}
+
+    @staticmethod
+    def _backup_value(node: Node, reward: float):
+        # visits were already counted as virtual loss during selection
+        cur = node
+        while cur is not None:
+            cur.value += reward
+            cur = cur.parent
+
+    def run(self, root_state: GameState, sims: Optional[int] = None, k: int = 8) -> str:
         if sims is None:
             sims = self.sims
-        root = Node(self.determinize(root_state))
-        # ensure children exist for hit/stay
-        self.expand(root)
-
-        for i in range(sims):
-            # selection
-            node = root
-            # selection using UCB1 until a leaf
-            while node.children:
-                node = self.best_child(node)
-
-            # expand
-            if node.visits > 0:
-                self.expand(node)
-                if node.children:
-                    node = random.choice(list(node.children.values()))
-
-            # simulate from a determinized clone
-            det_state = node.state.clone()
-            random.shuffle(det_state.deck.cards)
-            reward, info = self.default_policy(det_state)
-
-            # backpropagate
-            self.backup(node, reward)
-
-        # choose best action (highest average value)
+
+        # Root parallelization: grow independent trees on separate processes
+        # and merge their root statistics. Serial below 200 sims where the
+        # process spin-up would outweigh the search, and inside daemonic pool
+        # workers (e.g. the experiment harness), which may not fork children.
+        nproc = min(os.cpu_count() or 1, sims // 100) if sims >= 200 else 1
+        if nproc > 1 and not multiprocessing.current_process().daemon:
+            state_bytes = pickle.dumps(root_state)
+            share = sims // nproc
+            payloads = [(state_bytes, share + (1 if i < sims % nproc else 0),
+                         self.rng.randrange(2 ** 31), self.flip7_weight)
+                        for i in range(nproc)]
+            stats: Dict[str, Tuple[int, float]] = {}
+            with ProcessPoolExecutor(max_workers=nproc) as pool:
+                for partial in pool.map(_run_partial, payloads):
+                    for a, (v, val) in partial.items():
+                        pv, pval = stats.get(a, (0, 0.0))
+                        stats[a] = (pv + v, pval + val)
+        else:
+            stats = self._search(root_state, sims, k=k)
+
+        # choose best action (highest average value); unvisited actions all
+        # score -inf, so seed best_act with the first one rather than None
         best_act = None
         best_score = float('-inf')
-        for a, child in root.children.items():
-            if child.visits == 0:
+        for a, (visits, value) in stats.items():
+            if visits == 0:
                 score = float('-inf')
             else:
-                score = child.value / child.visits
-            if score > best_score:
+                score = value / visits
+            if best_act is None or score > best_score:
                 best_score = score
                 best_act = a
         return best_act
 
 
-def simulate_vs_stay(state: GameState, sims_list=(10, 100, 1000), flip7_weight: float = 50.0):
+def _simulate_batch(state: GameState, first_action: str, games: int,
+                    flip7_weight: float, rng: np.random.Generator):
+    """Play `games` determinized (first_action + random playout) episodes at once.
+
+    Vectorized equivalent of apply_action(first_action) followed by
+    default_policy on every clone: all games advance one draw per loop step,
+    with card effects applied through boolean masks over SoA state vectors
+    (deck row + cursor, seen bitmask, number sum/unique count, modifiers,
+    pending FlipThree draws, per-player totals). As in default_policy, the
+    playout runs past 'stay' banks and each game stops on a card-driven
+    round end, a winner, or an exhausted deck; the reward is the score delta
+    of the player to move once the first action has resolved, plus the
+    Flip7 bonus weight for playout Flip7s. Returns (rewards, first_busts)
+    where first_busts counts games whose forced first card bust directly.
+    """
+    B = games
+    idx = np.arange(B)
+    n = len(state.deck.codes)
+    P = state.num_players
+    top0 = state.deck.top
+
+    decks = np.tile(state.deck.codes, (B, 1))
+    if top0 < n:
+        decks[:, top0:] = rng.permuted(decks[:, top0:], axis=1)
+
+    top = np.full(B, top0, np.int64)
+    totals = np.tile(np.asarray(state.player_totals, np.int64), (B, 1))
+    seen = np.full(B, state.seen_mask, np.int64)
+    nsum = np.full(B, state.current_sum, np.int64)
+    nuniq = np.full(B, state.seen_mask.bit_count(), np.int64)
+    flat = np.full(B, state.flat_modifiers, np.int64)
+    x2 = np.full(B, state.x2, bool)
+    sc = np.full(B, state.second_chance_count, np.int64)
+    cur = np.full(B, state.current_player, np.int64)
+    pending = np.zeros(B, np.int64)
+    alive = np.ones(B, bool)
+    flip7_any = np.zeros(B, bool)
+    first_bust = np.zeros(B, bool)
+    # games still resolving the forced first hit (its FlipThree chain included)
+    phase0 = np.zeros(B, bool)
+    measured = np.full(B, state.current_player, np.int64)
+    base = np.zeros(B, np.int64)
+
+    def bank_score():
+        return np.where(x2, nsum * 2, nsum) + flat + np.where(nuniq >= 7, 15, 0)
+
+    def reset_line(m):
+        seen[m] = 0
+        nsum[m] = 0
+        nuniq[m] = 0
+        flat[m] = 0
+        x2[m] = False
+        sc[m] = 0
+
+    def snapshot(m):
+        # the forced action is resolved: rewards measure the player now to move
+        measured[m] = cur[m]
+        base[m] = totals[m, cur[m]]
+
+    if first_action == 'stay':
+        banked = seen != 0
+        totals[idx[banked], cur[banked]] += bank_score()[banked]
+        reset_line(alive)
+        won = totals[idx, cur] >= 200
+        cur[:] = (cur + 1) % P
+        snapshot(idx)
+        alive[won] = False
+    else:
+        phase0[:] = True
+        pending[:] = 1  # the forced first draw
+
+    while alive.any():
+        # deck exhausted: an owed FlipThree draw just evaporates, and a game
+        # that still needs a card is over (its open line stays unscored)
+        dry = alive & (top >= n)
+        if dry.any():
+            owed = dry & (pending > 0)
+            pending[owed] = 0
+            done0 = owed & phase0
+            if done0.any():
+                snapshot(idx[done0])
+                phase0[done0] = False
+            alive[dry] = False
+            if not alive.any():
+                break
+
+        # phase-1 games with no forced draws flip the hit/stay coin
+        deciding = alive & ~phase0 & (pending == 0)
+        if deciding.any():
+            staying = deciding & (rng.random(B) < 0.5)
+            if staying.any():
+                banked = staying & (seen != 0)
+                totals[idx[banked], cur[banked]] += bank_score()[banked]
+                reset_line(staying)
+                won = staying & (totals[idx, cur] >= 200)
+                cur[staying] = (cur[staying] + 1) % P
+                alive[won] = False
+        else:
+            staying = None
+
+        drawing = alive & (pending > 0)
+        if staying is None:
+            drawing |= deciding
+        else:
+            drawing |= deciding & ~staying
+        if not drawing.any():
+            continue
+
+        first_card = drawing & phase0 & (top == top0)
+        card = decks[idx[drawing], top[drawing]]
+        top[drawing] += 1
+        pending[drawing & (pending > 0)] -= 1
+
+        # scatter the drawn card codes back to full-width vectors
+        code = np.full(B, -1, np.int64)
+        code[drawing] = card
+
+        round_end = np.zeros(B, bool)
+
+        is_num = drawing & (code >= 0) & (code <= 12)
+        if is_num.any():
+            bit = np.where(is_num, 1 << (code & 15), 0)
+            dup = is_num & ((seen & bit) != 0)
+            saved = dup & (sc > 0)
+            sc[saved] -= 1
+            busted = dup & ~saved
+            if busted.any():
+                reset_line(busted)
+                round_end |= busted
+                first_bust |= busted & first_card
+            fresh = is_num & ~dup
+            if fresh.any():
+                seen[fresh] |= bit[fresh]
+                nsum[fresh] += code[fresh]
+                nuniq[fresh] += 1
+                flip7 = fresh & (nuniq >= 7)
+                if flip7.any():
+                    totals[idx[flip7], cur[flip7]] += bank_score()[flip7]
+                    flip7_any |= flip7 & ~phase0
+                    reset_line(flip7)
+                    round_end |= flip7
+
+        is_mod = drawing & (code >= 13) & (code <= 21)
+        flat[is_mod] += code[is_mod] - 11
+
+        x2[drawing & (code == 22)] = True
+
+        froze = drawing & (code == 23)
+        if froze.any():
+            banked = froze & (seen != 0)
+            totals[idx[banked], cur[banked]] += bank_score()[banked]
+            reset_line(froze)
+            round_end |= froze
+
+        pending[drawing & (code == 24)] += 3
+        sc[drawing & (code == 25)] += 1
+
+        if round_end.any():
+            won = round_end & (totals[idx, cur] >= 200)
+            cur[round_end] = (cur[round_end] + 1) % P
+            ended0 = round_end & phase0
+            if ended0.any():
+                # forced first action resolved by ending the round: the
+                # playout (and the reward) belongs to the next player
+                pending[ended0] = 0
+                snapshot(idx[ended0])
+                phase0[ended0] = False
+            alive[round_end & ~ended0] = False
+            alive[won] = False
+
+        # forced first hit resolved without ending the round
+        done0 = alive & phase0 & (pending == 0)
+        if done0.any():
+            snapshot(idx[done0])
+            phase0[done0] = False
+
+    rewards = (totals[idx, measured] - base).astype(np.float64)
+    rewards[flip7_any] += flip7_weight
+    return rewards, int(first_bust.sum())
+
+
+def simulate_vs_stay(state: GameState, sims_list=(10, 100, 1000), flip7_weight: float = 50.0,
+                     rng: Optional[np.random.Generator] = None):
+    if rng is None:
+        rng = np.random.default_rng()
     results = {}
     for sims in sims_list:
-        hit_busts = 0
-        hit_points = 0.0
-        stay_busts = 0
-        stay_points = 0.0
-        for _ in range(sims):
-            # Hit scenario
-            st_hit = state.clone()
-            random.shuffle(st_hit.deck.cards)
-            try:
-                res = st_hit.apply_action('hit')
-            except IndexError:
-                # empty deck
-                continue
-            reward, info = MCTSAgent(sims=0, flip7_weight=flip7_weight).default_policy(st_hit)
-            if res.get('result') == 'bust':
-                hit_busts += 1
-            hit_points += reward
-
-            # Stay scenario
-            st_stay = state.clone()
-            random.shuffle(st_stay.deck.cards)
-            try:
-                res2 = st_stay.apply_action('stay')
-            except IndexError:
-                continue
-            reward2, info2 = MCTSAgent(sims=0, flip7_weight=flip7_weight).default_policy(st_stay)
-            if res2.get('result') == 'bust':
-                stay_busts += 1
-            stay_points += reward2
-
+        hit_rewards, hit_busts = _simulate_batch(state, 'hit', sims, flip7_weight, rng)
+        stay_rewards, stay_busts = _simulate_batch(state, 'stay', sims, flip7_weight, rng)
         results[sims] = {
             'hit_bust_rate': hit_busts / max(1, sims),
             'stay_bust_rate': stay_busts / max(1, sims),
-            'hit_avg_points': hit_points / max(1, sims),
-            'stay_avg_points': stay_points / max(1, sims),
+            'hit_avg_points': float(hit_rewards.sum()) / max(1, sims),
+            'stay_avg_points': float(stay_rewards.sum()) / max(1, sims),
         }
     return results
 
@@ -183,7 +702,8 @@ if __name__ == '__main__':
         sims_list = (10, 100, 1000)
         out_file = 'flip7_weight_tuning.csv'
         with open(out_file, 'w', newline='') as f:
-            writer = csv.writer(f)
+            # LF terminator so regenerated files diff cleanly in git
+            writer = csv.writer(f, lineterminator='\n')
             writer.writerow(['weight', 'sims', 'hit_bust_rate', 'stay_bust_rate', 'hit_avg_points', 'stay_avg_points'])
             for w in weights:
                 print(f'Running tuning for weight={w}')
@@ -0,0 +1,14 @@
+"""Optional native build of the rollout kernel.
+
+    python setup.py build_ext --inplace
+
+Requires Cython; the project runs fine without it (mcts_agent falls back
+to numba or the interpreted loop).
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='flip-seven-ai',
+    ext_modules=cythonize('flip7_engine_c.pyx'),
+)